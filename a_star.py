@@ -1,3 +1,5 @@
+# Standalone A* pathfinding demo (run with `python a_star.py`). The simulation
+# does not import this module; evacuation routing uses FlowField in schoolmodel.py.
 import pygame
 import math
 import heapq
@@ -74,7 +76,8 @@ class Student:
         Returns:
             bool: True if the student is at or beyond the screen boundaries.
         """
-        return self.x <= 0 or self.x >= WIDTH or self.y <= 0 or self.y >= HEIGHT
+        x, y = self.x, self.y
+        return not (0 < x < WIDTH and 0 < y < HEIGHT)
 
 def astar(start, goal, walls):
     """
@@ -102,6 +105,16 @@ def astar(start, goal, walls):
         """
         return math.hypot(a[0] - b[0], a[1] - b[1])
 
+    step_size = 5
+    directions = [
+        (step_size, 0), (-step_size, 0), (0, step_size), (0, -step_size),
+        (step_size, step_size), (-step_size, step_size),
+        (step_size, -step_size), (-step_size, -step_size)
+    ]
+    # Every node lies on the lattice through start, so each point is tested against the walls once
+    # and the answer is remembered for the other nodes that reach it.
+    blocked = {}
+
     open_set = []
     heapq.heappush(open_set, (0, start))
     came_from = {}
@@ -119,21 +132,18 @@ def astar(start, goal, walls):
             path.reverse()
             return path
 
-        step_size = 5
-        directions = [
-            (step_size, 0), (-step_size, 0), (0, step_size), (0, -step_size),
-            (step_size, step_size), (-step_size, step_size),
-            (step_size, -step_size), (-step_size, -step_size)
-        ]
-
         for dx, dy in directions:
             neighbor = (current[0] + dx, current[1] + dy)
 
             if not (0 <= neighbor[0] <= WIDTH and 0 <= neighbor[1] <= HEIGHT):
                 continue
 
-            point_rect = pygame.Rect(neighbor[0] - 2, neighbor[1] - 2, 4, 4)
-            if any(point_rect.colliderect(wall) for wall in walls):
+            is_blocked = blocked.get(neighbor)
+            if is_blocked is None:
+                point_rect = pygame.Rect(neighbor[0] - 2, neighbor[1] - 2, 4, 4)
+                is_blocked = point_rect.collidelist(walls) != -1
+                blocked[neighbor] = is_blocked
+            if is_blocked:
                 continue
 
             tentative_g_score = g_score[current] + heuristic(current, neighbor)
@@ -189,11 +199,10 @@ def main():
         for wall in walls:
             pygame.draw.rect(screen, BLACK, wall)
 
-        for student in students[:]:
+        for student in students:
             student.move()
             student.draw()
-            if student.at_exit():
-                students.remove(student)
+        students = [student for student in students if not student.at_exit()]
 
         pygame.display.flip()
 
@@ -1,12 +1,25 @@
-from agents.schoolagent import SchoolAgent
+from agents.schoolagent import SchoolAgent, KIND_ADULT
 import random
 import math
-from utilities import has_line_of_sight
+import config
+
+
+VERBOSE_AGENT_EVENTS = config.VERBOSE_AGENT_EVENTS
 
 
 class AdultAgent(SchoolAgent):
     """Agent class for adults (teachers, staff) with response behaviors for active shooters."""
 
+    __slots__ = (
+        'color', 'aware_of_shooter', 'awareness_time', 'locked_target',
+        'target_lock_time', 'target_last_seen_time', 'target_in_sight',
+        'max_response_distance', 'max_response_distance_sq',
+        'target_acquisition_range_sq', 'gunshot_awareness_range_sq', 'shooting_range',
+        'shooting_range_sq', 'last_shot_time', 'shooting_interval', 'hit_probability',
+        'target_acquisition_range', 'max_target_pursuit_time', 'max_target_lost_time',
+        'has_alerted_others'
+    )
+
     def __init__(self, unique_id, model, position, agent_type):
         """
         Initialize an AdultAgent.
@@ -27,14 +40,19 @@ class AdultAgent(SchoolAgent):
         self.locked_target = None
         self.target_lock_time = 0
         self.target_last_seen_time = 0
+        self.target_in_sight = False
 
         self.max_response_distance = 100.0
+        self.max_response_distance_sq = self.max_response_distance ** 2
         self.shooting_range = 25.0
+        self.shooting_range_sq = self.shooting_range ** 2
         self.last_shot_time = 0.0
         self.shooting_interval = 1.5
         self.hit_probability = 0.8
 
         self.target_acquisition_range = 150.0
+        self.target_acquisition_range_sq = self.target_acquisition_range ** 2
+        self.gunshot_awareness_range_sq = (self.target_acquisition_range * 1.5) ** 2
         self.max_target_pursuit_time = 15.0
         self.max_target_lost_time = 3.0
 
@@ -47,9 +65,10 @@ class AdultAgent(SchoolAgent):
         Args:
             dt: The time step duration.
         """
-        current_time = self.model.simulation_time
+        model = self.model
+        current_time = model.simulation_time
 
-        if self.model.has_active_shooter and not self.aware_of_shooter:
+        if model.has_active_shooter and not self.aware_of_shooter:
             self._check_shooter_awareness(current_time)
 
         if self.aware_of_shooter and self.has_weapon:
@@ -65,7 +84,8 @@ class AdultAgent(SchoolAgent):
                  # Initiate communication: Alert nearby adults even if unarmed. (Doing by Talking)
                 self._alert_nearby_adults()
                 self.has_alerted_others = True
-                print(f"Adult {self.unique_id} alerted others about shooter")
+                if VERBOSE_AGENT_EVENTS:
+                    print(f"Adult {self.unique_id} alerted others about shooter")
 
             self.target_speed = self.max_speed * 0.5
             super().move_continuous(dt)
@@ -81,32 +101,36 @@ class AdultAgent(SchoolAgent):
         Args:
             current_time: The current simulation time.
         """
-        for shooter in self.model.active_shooters:
-            if shooter in self.model.schedule:
-                dx = shooter.position[0] - self.position[0]
-                dy = shooter.position[1] - self.position[1]
+        model = self.model
+        pos_x, pos_y = self.position
+
+        for shooter in model.active_shooters:
+            if shooter.alive:
+                shooter_x, shooter_y = shooter.position
+                dx = shooter_x - pos_x
+                dy = shooter_y - pos_y
                 dist_squared = dx * dx + dy * dy
 
-                if dist_squared < self.target_acquisition_range ** 2:
-                    if has_line_of_sight(self.position, shooter.position, self.model.walls):
+                if dist_squared < self.target_acquisition_range_sq:
+                    if model.wall_grid.has_line_of_sight(self.position, shooter.position):
                         self.aware_of_shooter = True
                         self.awareness_time = current_time
-                        print(f"Adult {self.unique_id} spotted shooter {shooter.unique_id}")
+                        if VERBOSE_AGENT_EVENTS:
+                            print(f"Adult {self.unique_id} spotted shooter {shooter.unique_id}")
                         return
 
-        for shot in self.model.active_shots:
-            shot_time = shot['start_time']
-            if current_time - shot_time < 2.0:
-                shot_x, shot_y = shot['start_pos']
-                dx = shot_x - self.position[0]
-                dy = shot_y - self.position[1]
-                dist_squared = dx * dx + dy * dy
+        for shot_start_pos, _ in model.recent_shots:
+            shot_x, shot_y = shot_start_pos
+            dx = shot_x - pos_x
+            dy = shot_y - pos_y
+            dist_squared = dx * dx + dy * dy
 
-                if dist_squared < (self.target_acquisition_range * 1.5) ** 2:
-                    self.aware_of_shooter = True
-                    self.awareness_time = current_time
+            if dist_squared < self.gunshot_awareness_range_sq:
+                self.aware_of_shooter = True
+                self.awareness_time = current_time
+                if VERBOSE_AGENT_EVENTS:
                     print(f"Adult {self.unique_id} heard gunshots")
-                    return
+                return
 
     def _alert_nearby_adults(self):
         """
@@ -114,16 +138,19 @@ class AdultAgent(SchoolAgent):
         This implements the "Doing by Talking" concept: the act of alerting causes others to become aware.
         """
         alert_radius = 50.0
-        nearby_agents = self.model.spatial_grid.get_nearby_agents(self.position, alert_radius)
+        model = self.model
+        position = self.position
+        nearby_agents = model.spatial_grid.get_nearby_agents(position, alert_radius)
 
         for agent in nearby_agents:
-            if (agent != self and agent in self.model.schedule and
-                    agent.agent_type == "adult" and not getattr(agent, "aware_of_shooter", False)):
-                if has_line_of_sight(self.position, agent.position, self.model.walls):
+            if (agent != self and agent.alive and
+                    agent.kind == KIND_ADULT and not getattr(agent, "aware_of_shooter", False)):
+                if model.wall_grid.has_line_of_sight(position, agent.position):
                     # Talking (alerting) causes Doing (setting awareness in the other agent).
                     agent.aware_of_shooter = True
-                    agent.awareness_time = self.model.simulation_time
-                    print(f"Adult {self.unique_id} alerted adult {agent.unique_id}")
+                    agent.awareness_time = model.simulation_time
+                    if VERBOSE_AGENT_EVENTS:
+                        print(f"Adult {self.unique_id} alerted adult {agent.unique_id}")
 
     def _shooter_response(self, dt, current_time):
         """
@@ -155,22 +182,25 @@ class AdultAgent(SchoolAgent):
         Returns:
             bool: True if the target is still valid, False otherwise.
         """
-        if self.locked_target is None:
+        target = self.locked_target
+        if target is None:
             return False
 
-        if self.locked_target not in self.model.schedule:
+        if not target.alive:
             self.locked_target = None
             return False
 
-        if not getattr(self.locked_target, "is_shooter", False):
+        if not getattr(target, "is_shooter", False):
             self.locked_target = None
             return False
 
-        dx = self.locked_target.position[0] - self.position[0]
-        dy = self.locked_target.position[1] - self.position[1]
+        pos_x, pos_y = self.position
+        target_x, target_y = target.position
+        dx = target_x - pos_x
+        dy = target_y - pos_y
         distance_squared = dx * dx + dy * dy
 
-        if distance_squared > self.max_response_distance ** 2:
+        if distance_squared > self.max_response_distance_sq:
             self.locked_target = None
             return False
 
@@ -178,7 +208,8 @@ class AdultAgent(SchoolAgent):
             self.locked_target = None
             return False
 
-        has_sight = has_line_of_sight(self.position, self.locked_target.position, self.model.walls)
+        has_sight = self.model.wall_grid.has_line_of_sight(self.position, target.position)
+        self.target_in_sight = has_sight
         if has_sight:
             self.target_last_seen_time = current_time
             return True
@@ -197,27 +228,36 @@ class AdultAgent(SchoolAgent):
             current_time: The current simulation time.
         """
         search_radius = self.target_acquisition_range
-        nearby_agents = self.model.spatial_grid.get_nearby_agents(self.position, search_radius)
-
-        visible_shooters = []
+        position = self.position
+        pos_x, pos_y = position
+        wall_grid = self.model.wall_grid
+        nearby_agents = self.model.spatial_grid.get_nearby_agents(position, search_radius)
+
+        # Running argmin instead of collecting and sorting; strict < keeps the earliest of equal distances.
+        best_shooter = None
+        best_dist_squared = float('inf')
         for agent in nearby_agents:
-            if (agent in self.model.schedule and
+            if (agent.alive and
                     getattr(agent, "is_shooter", False) and
-                    has_line_of_sight(self.position, agent.position, self.model.walls)):
-                dx = self.position[0] - agent.position[0]
-                dy = self.position[1] - agent.position[1]
+                    wall_grid.has_line_of_sight(position, agent.position)):
+                agent_x, agent_y = agent.position
+                dx = pos_x - agent_x
+                dy = pos_y - agent_y
                 dist_squared = dx * dx + dy * dy
 
-                visible_shooters.append((agent, dist_squared))
+                if dist_squared < best_dist_squared:
+                    best_shooter = agent
+                    best_dist_squared = dist_squared
 
-        if not visible_shooters:
+        if best_shooter is None:
             return
 
-        visible_shooters.sort(key=lambda x: x[1])
-        self.locked_target = visible_shooters[0][0]
+        self.locked_target = best_shooter
         self.target_lock_time = current_time
         self.target_last_seen_time = current_time
-        print(f"Adult {self.unique_id} targeting shooter {self.locked_target.unique_id}")
+        self.target_in_sight = True
+        if VERBOSE_AGENT_EVENTS:
+            print(f"Adult {self.unique_id} targeting shooter {self.locked_target.unique_id}")
 
     def _pursue_shooter(self, dt, current_time):
         """
@@ -227,20 +267,21 @@ class AdultAgent(SchoolAgent):
             dt: The time step duration.
             current_time: The current simulation time.
         """
-        if self.locked_target is None or self.locked_target not in self.model.schedule:
+        if self.locked_target is None or not self.locked_target.alive:
             return
 
         target_x, target_y = self.locked_target.position
-        dx = target_x - self.position[0]
-        dy = target_y - self.position[1]
-        distance = math.sqrt(dx * dx + dy * dy)
+        pos_x, pos_y = self.position
+        dx = target_x - pos_x
+        dy = target_y - pos_y
+        distance_sq = dx * dx + dy * dy
 
-        target_angle = math.atan2(dy, dx)
+        # Sight was already tested this tick by _validate_locked_target or _find_shooter_target.
+        has_sight = self.target_in_sight
 
-        has_sight = has_line_of_sight(self.position, self.locked_target.position, self.model.walls)
-
-        if distance > self.shooting_range:
-            self.direction = target_angle
+        # The heading is only needed when moving; an adult holding position to fire skips the atan2.
+        if distance_sq > self.shooting_range_sq:
+            self.direction = math.atan2(dy, dx)
             self.target_speed = self.max_speed * 0.8
 
             if not has_sight:
@@ -254,48 +295,44 @@ class AdultAgent(SchoolAgent):
                 if current_time - self.last_shot_time >= self.shooting_interval:
                     self._shoot_at_shooter(current_time)
             else:
-                perp_angle = target_angle + (math.pi / 2)
+                perp_angle = math.atan2(dy, dx) + (math.pi / 2)
                 self.direction = random.choice([perp_angle, perp_angle - math.pi]) % (2 * math.pi)
                 self.target_speed = self.max_speed * 0.5
 
     def _shoot_at_shooter(self, current_time):
         """
-        Attempt to shoot the locked target if line of sight is confirmed.
+        Attempt to shoot the locked target.
+
+        The caller is expected to have confirmed line of sight this tick.
 
         Args:
             current_time: The current simulation time.
         """
-        if self.locked_target is None or self.locked_target not in self.model.schedule:
-            return
-
-        if not has_line_of_sight(self.position, self.locked_target.position, self.model.walls):
+        if self.locked_target is None or not self.locked_target.alive:
             return
 
-        shot = {
-            'start_pos': self.position,
-            'end_pos': self.locked_target.position,
-            'start_time': current_time
-        }
-        self.model.active_shots.append(shot)
+        model = self.model
+        model.record_shot(self.position, self.locked_target.position, current_time)
 
-        if hasattr(self.model, 'gunshot_sound') and self.model.gunshot_sound:
-            self.model.gunshot_sound.play()
+        if hasattr(model, 'gunshot_sound') and model.gunshot_sound:
+            model.gunshot_sound.play()
 
         if random.random() < self.hit_probability:
             print(f"Adult {self.unique_id} neutralized shooter {self.locked_target.unique_id}")
 
-            if hasattr(self.model, 'kill_sound') and self.model.kill_sound:
-                self.model.kill_sound.play()
+            if hasattr(model, 'kill_sound') and model.kill_sound:
+                model.kill_sound.play()
 
             target = self.locked_target
             self.locked_target = None
 
-            if target in self.model.active_shooters:
-                self.model.active_shooters.remove(target)
+            if target in model.active_shooters:
+                model.active_shooters.remove(target)
 
-            self.model.remove_agent(target, reason="died")
+            model.remove_agent(target, reason="died")
         else:
-            print(f"Adult {self.unique_id} missed shot at shooter {self.locked_target.unique_id}")
+            if VERBOSE_AGENT_EVENTS:
+                print(f"Adult {self.unique_id} missed shot at shooter {self.locked_target.unique_id}")
 
         self.last_shot_time = current_time
 
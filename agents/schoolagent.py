@@ -1,13 +1,27 @@
 import random
 import math
-from utilities import has_line_of_sight
 import config
 import pygame
 
 
+# Integer agent kinds, compared in the neighbour loops instead of the agent_type strings.
+KIND_STUDENT = 0
+KIND_ADULT = 1
+
+
 class SchoolAgent:
     """Base agent class for all agents in the school simulation."""
 
+    __slots__ = (
+        'position', 'unique_id', 'model', 'agent_type', 'kind', 'alive', 'has_weapon',
+        'awareness', 'radius', 'mass', 'max_speed', 'idle_prob', 'idle_duration',
+        'path_time', 'response_delay', 'velocity', 'direction', 'cached_direction',
+        'direction_cos', 'direction_sin', 'target_speed', 'acceleration',
+        'current_path_time', 'is_idle', 'idle_time', 'personal_space', 'min_distance',
+        'avoidance_strength', 'wall_avoidance_strength', 'wall_avoidance_margin',
+        'personal_space_squared', 'last_wall_collision_vector', 'max_x', 'max_y'
+    )
+
     def __init__(self, unique_id, model, agent_type, position):
         """
         Initialize a base SchoolAgent.
@@ -21,7 +35,9 @@ class SchoolAgent:
         self.unique_id = unique_id
         self.model = model
         self.agent_type = agent_type
+        self.kind = KIND_ADULT if agent_type == "adult" else KIND_STUDENT
         self.position = position
+        self.alive = True
         self.has_weapon = False
         self.awareness = 0.0
 
@@ -43,6 +59,9 @@ class SchoolAgent:
 
         self.velocity = (0.0, 0.0)
         self.direction = random.uniform(0, 2 * math.pi)
+        self.cached_direction = None
+        self.direction_cos = 1.0
+        self.direction_sin = 0.0
         self.target_speed = random.uniform(0.75 * self.max_speed, self.max_speed)
         self.acceleration = 0.8
 
@@ -57,66 +76,84 @@ class SchoolAgent:
         self.wall_avoidance_margin = self.radius * 10.0
 
         self.personal_space_squared = self.personal_space ** 2
-        self.min_distance_squared = self.min_distance ** 2
 
         self.last_wall_collision_vector = None
 
-    def get_forces_and_collisions(self, proposed_position=None):
+        # Upper clamp bounds for the agent's centre; the radius and the model size never change.
+        self.max_x = model.width - self.radius
+        self.max_y = model.height - self.radius
+
+    def calculate_agent_avoidance(self, nearby_agents=None):
         """
-        Calculate agent-agent avoidance forces and check for collisions at a given position.
+        Calculate personal-space avoidance forces from nearby agents.
 
         Args:
-            proposed_position (tuple, optional): The position to check forces/collisions at.
-                                                 If None, uses the agent's current position. Defaults to None.
+            nearby_agents (list, optional): Candidate neighbours already fetched from the spatial grid.
+                                            If None, the grid is queried around the agent's position.
 
         Returns:
-            tuple: (force_x, force_y, would_collide) where forces are avoidance forces
-                   and would_collide is True if a collision would occur at the proposed position.
+            tuple: (force_x, force_y) avoidance force pushing away from neighbours.
         """
         force_x, force_y = 0, 0
-        would_collide = False
-        check_position = proposed_position if proposed_position else self.position
+        position = self.position
 
-        search_radius = max(self.personal_space, self.min_distance)
-        nearby_agents = self.model.spatial_grid.get_nearby_agents(check_position, search_radius)
+        if nearby_agents is None:
+            search_radius = max(self.personal_space, self.min_distance)
+            nearby_agents = self.model.spatial_grid.get_nearby_agents(position, search_radius)
 
         personal_space_sq = self.personal_space_squared
-        min_distance_sq = self.min_distance_squared
-        check_x, check_y = check_position
+        personal_space = self.personal_space
+        avoidance_strength = self.avoidance_strength
+        check_x, check_y = position
 
         for agent in nearby_agents:
-            if agent != self and agent in self.model.schedule:
+            if agent is not self and agent.alive:
                 agent_x, agent_y = agent.position
                 dx = check_x - agent_x
                 dy = check_y - agent_y
                 dist_squared = dx * dx + dy * dy
 
-                combined_radii = self.radius + agent.radius
-                combined_radii_sq = combined_radii * combined_radii
-
-                if proposed_position and dist_squared < combined_radii_sq:
-                    would_collide = True
-                    if dist_squared > 1e-6:
-                        dist = math.sqrt(dist_squared)
-                        overlap = combined_radii - dist
-                        push_force = self.avoidance_strength * overlap * 15
-                        force_x += (dx / dist) * push_force
-                        force_y += (dy / dist) * push_force
-                    else:
-                        force_x += random.uniform(-1, 1) * self.avoidance_strength * 10
-                        force_y += random.uniform(-1, 1) * self.avoidance_strength * 10
+                if dist_squared < personal_space_sq and dist_squared > 1e-6:
+                    # One square root and one division serve both the falloff and the normalisation.
+                    inv_dist = 1.0 / math.sqrt(dist_squared)
+                    falloff = personal_space * inv_dist - 1.0
+                    force_scale = avoidance_strength * falloff * falloff * inv_dist
+
+                    force_x += dx * force_scale
+                    force_y += dy * force_scale
+
+        return force_x, force_y
+
+    def would_collide_with_agent(self, position, nearby_agents=None):
+        """
+        Check if placing this agent at a given position would overlap another living agent.
+        Unlike calculate_agent_avoidance, no forces are accumulated and the scan stops at the first overlap.
 
-                elif dist_squared < personal_space_sq and dist_squared > 1e-6:
-                    dist = math.sqrt(dist_squared)
-                    force_strength = self.avoidance_strength * (self.personal_space / dist - 1.0) ** 2
+        Args:
+            position (tuple): The (x, y) position to check.
+            nearby_agents (list, optional): Candidate neighbours already fetched from the spatial grid.
+                                            If None, the grid is queried around the position.
 
-                    norm_dx = dx / dist
-                    norm_dy = dy / dist
+        Returns:
+            bool: True if the position overlaps another agent, False otherwise.
+        """
+        if nearby_agents is None:
+            search_radius = max(self.personal_space, self.min_distance)
+            nearby_agents = self.model.spatial_grid.get_nearby_agents(position, search_radius)
 
-                    force_x += norm_dx * force_strength
-                    force_y += norm_dy * force_strength
+        radius = self.radius
+        check_x, check_y = position
 
-        return force_x, force_y, would_collide
+        for agent in nearby_agents:
+            if agent is not self and agent.alive:
+                agent_x, agent_y = agent.position
+                dx = check_x - agent_x
+                dy = check_y - agent_y
+                combined_radii = radius + agent.radius
+                if dx * dx + dy * dy < combined_radii * combined_radii:
+                    return True
+
+        return False
 
     def calculate_wall_avoidance(self):
         """
@@ -148,20 +185,35 @@ class SchoolAgent:
             force = self.wall_avoidance_strength * (margin / max(dist, 1e-4)) ** 1.5
             force_y -= force
 
-        for wall_rect in self.model.walls:
-            closest_x = max(wall_rect.left, min(pos_x, wall_rect.right))
-            closest_y = max(wall_rect.top, min(pos_y, wall_rect.bottom))
-
-            dx = pos_x - closest_x
-            dy = pos_y - closest_y
+        # A C-level rectangle test picks the walls that can lie within the margin; the indices come back
+        # in list order, so forces accumulate exactly as they did over the full wall list.
+        wall_bounds = self.model.wall_bounds
+        reach_rect = pygame.Rect(int(pos_x - margin) - 1, int(pos_y - margin) - 1,
+                                 int(2 * margin) + 3, int(2 * margin) + 3)
+        for wall_index in reach_rect.collidelistall(self.model.walls):
+            # Offset to the closest point of the wall, with comparisons instead of max/min calls.
+            left, top, right, bottom = wall_bounds[wall_index]
+            if pos_x < left:
+                dx = pos_x - left
+            elif pos_x > right:
+                dx = pos_x - right
+            else:
+                dx = 0.0
+            if pos_y < top:
+                dy = pos_y - top
+            elif pos_y > bottom:
+                dy = pos_y - bottom
+            else:
+                dy = 0.0
             dist_squared = dx * dx + dy * dy
 
             if 0 < dist_squared < margin_sq:
-                dist = math.sqrt(dist_squared)
-                force_strength = self.wall_avoidance_strength * (margin / dist - 1.0) ** 2
+                inv_dist = 1.0 / math.sqrt(dist_squared)
+                falloff = margin * inv_dist - 1.0
+                force_strength = self.wall_avoidance_strength * falloff * falloff
 
-                norm_dx = dx / dist
-                norm_dy = dy / dist
+                norm_dx = dx * inv_dist
+                norm_dy = dy * inv_dist
 
                 force_x += norm_dx * force_strength
                 force_y += norm_dy * force_strength
@@ -197,13 +249,25 @@ class SchoolAgent:
                                                                  random.uniform(-1, 1)).normalize()
             return True
 
-        for wall_rect in self.model.walls:
-            inflated_wall = wall_rect.inflate(check_radius * 2, check_radius * 2)
-            if inflated_wall.collidepoint(x, y):
-                closest_x = max(wall_rect.left, min(x, wall_rect.right))
-                closest_y = max(wall_rect.top, min(y, wall_rect.bottom))
-                dx = x - closest_x
-                dy = y - closest_y
+        inflated_walls = self.model.inflated_walls(check_radius * 2)
+        wall_bounds = self.model.wall_bounds
+        probe_margin = int(check_radius) + 2
+
+        for wall_index in self.model.wall_grid.obstacles_near(x, y, probe_margin):
+            if inflated_walls[wall_index].collidepoint(x, y):
+                left, top, right, bottom = wall_bounds[wall_index]
+                if x < left:
+                    dx = x - left
+                elif x > right:
+                    dx = x - right
+                else:
+                    dx = 0.0
+                if y < top:
+                    dy = y - top
+                elif y > bottom:
+                    dy = y - bottom
+                else:
+                    dy = 0.0
                 dist_sq = dx * dx + dy * dy
                 if dist_sq < check_radius * check_radius:
                     if dist_sq > 1e-6:
@@ -257,10 +321,28 @@ class SchoolAgent:
                 self.idle_time = 0
                 return
 
-        target_vx_base = self.target_speed * math.cos(self.direction)
-        target_vy_base = self.target_speed * math.sin(self.direction)
+        if self.direction != self.cached_direction:
+            self.cached_direction = self.direction
+            self.direction_cos = math.cos(self.direction)
+            self.direction_sin = math.sin(self.direction)
 
-        avoidance_fx, avoidance_fy, _ = self.get_forces_and_collisions()
+        target_vx_base = self.target_speed * self.direction_cos
+        target_vy_base = self.target_speed * self.direction_sin
+
+        # One grid query serves both the avoidance forces and the final overlap test: the radius is
+        # widened by the longest step this move can take, so it also covers the destination. Steps
+        # longer than the personal space (large headless dt) would widen it too far; the overlap
+        # test then queries around the destination itself.
+        search_radius = max(self.personal_space, self.min_distance)
+        step_reach = self.max_speed * dt
+        if step_reach <= self.personal_space:
+            nearby_agents = self.model.spatial_grid.get_nearby_agents(self.position, search_radius + step_reach)
+            collision_agents = nearby_agents
+        else:
+            nearby_agents = self.model.spatial_grid.get_nearby_agents(self.position, search_radius)
+            collision_agents = None
+
+        avoidance_fx, avoidance_fy = self.calculate_agent_avoidance(nearby_agents)
         wall_fx, wall_fy = self.calculate_wall_avoidance()
 
         total_force_x = avoidance_fx * 0.5 + wall_fx * 1.5
@@ -290,54 +372,79 @@ class SchoolAgent:
 
         self.velocity = (final_vx, final_vy)
 
-        step_vx, step_vy = self.velocity
-        potential_x = self.position[0] + step_vx * dt
-        potential_y = self.position[1] + step_vy * dt
-
-        potential_pos = (potential_x, potential_y)
+        pos_x, pos_y = self.position
+        potential_x = pos_x + final_vx * dt
+        potential_y = pos_y + final_vy * dt
 
-        wall_collision = self.would_collide_with_wall(potential_pos)
+        wall_collision = self.would_collide_with_wall((potential_x, potential_y))
 
-        final_pos = potential_pos
+        final_x, final_y = potential_x, potential_y
         if wall_collision and self.last_wall_collision_vector:
-            vel_vec = pygame.Vector2(self.velocity)
-            wall_normal = self.last_wall_collision_vector.normalize()
+            # Scalar form of the slide: same operations as the Vector2 version, without temporary vectors.
+            normal_x, normal_y = self.last_wall_collision_vector
+            normal_length = math.sqrt(normal_x * normal_x + normal_y * normal_y)
+            normal_x /= normal_length
+            normal_y /= normal_length
 
-            vel_dot_normal = vel_vec.dot(wall_normal)
+            vel_dot_normal = final_vx * normal_x + final_vy * normal_y
 
             if vel_dot_normal < 0:
-                vel_into_wall = wall_normal * vel_dot_normal
-                vel_tangential = vel_vec - vel_into_wall
+                tangential_vx = final_vx - normal_x * vel_dot_normal
+                tangential_vy = final_vy - normal_y * vel_dot_normal
 
                 bounce_factor = 0.1
-                vel_bounce = wall_normal * abs(vel_dot_normal) * bounce_factor
-
-                self.velocity = (vel_tangential.x + vel_bounce.x, vel_tangential.y + vel_bounce.y)
+                bounce_speed = abs(vel_dot_normal)
+                step_vx_adj = tangential_vx + normal_x * bounce_speed * bounce_factor
+                step_vy_adj = tangential_vy + normal_y * bounce_speed * bounce_factor
             else:
-                self.velocity = (vel_vec.x * 0.8, vel_vec.y * 0.8)
-
-            step_vx_adj, step_vy_adj = self.velocity
-            potential_x_adj = self.position[0] + step_vx_adj * dt
-            potential_y_adj = self.position[1] + step_vy_adj * dt
-            final_pos = (potential_x_adj, potential_y_adj)
-
-            if self.would_collide_with_wall(final_pos):
-                final_pos = self.position
-                self.velocity = (0, 0)
+                step_vx_adj = final_vx * 0.8
+                step_vy_adj = final_vy * 0.8
+
+            self.velocity = (step_vx_adj, step_vy_adj)
+            final_x = pos_x + step_vx_adj * dt
+            final_y = pos_y + step_vy_adj * dt
+
+            if self.would_collide_with_wall((final_x, final_y)):
+                # Bisect the sliding step for the largest collision-free fraction instead of stopping dead.
+                # Two halvings keep the blocked path at three probes after the first hit.
+                low, high = 0.0, 1.0
+                for _ in range(2):
+                    mid = (low + high) * 0.5
+                    if self.would_collide_with_wall((pos_x + step_vx_adj * dt * mid, pos_y + step_vy_adj * dt * mid)):
+                        high = mid
+                    else:
+                        low = mid
+
+                if low > 0.0:
+                    final_x = pos_x + step_vx_adj * dt * low
+                    final_y = pos_y + step_vy_adj * dt * low
+                    self.velocity = (step_vx_adj * low, step_vy_adj * low)
+                else:
+                    final_x, final_y = pos_x, pos_y
+                    self.velocity = (0, 0)
+
+        # Plain comparisons keep the in-bounds case, by far the most common, free of builtin calls.
+        radius = self.radius
+        if final_x < radius:
+            final_x = radius
+        elif final_x > self.max_x:
+            final_x = self.max_x
+        if final_y < radius:
+            final_y = radius
+        elif final_y > self.max_y:
+            final_y = self.max_y
 
-        final_x = max(self.radius, min(final_pos[0], self.model.width - self.radius))
-        final_y = max(self.radius, min(final_pos[1], self.model.height - self.radius))
         final_pos = (final_x, final_y)
-
-        _, _, agent_collision = self.get_forces_and_collisions(final_pos)
-
-        if agent_collision:
-            final_pos = self.position
+        if self.would_collide_with_agent(final_pos, collision_agents):
             self.velocity = (0, 0)
+            return
+
+        # An unchanged position needs no grid update.
+        if final_x == pos_x and final_y == pos_y:
+            return
 
-        if final_pos != self.position:
-            self.position = final_pos
-            self.model.spatial_grid.update_agent(self)
+        self.position = final_pos
+        self.model.spatial_grid.update_agent(self)
 
     def has_line_of_sight(self, target_position):
         """
@@ -349,7 +456,7 @@ class SchoolAgent:
         Returns:
             bool: True if line of sight exists, False otherwise.
         """
-        return has_line_of_sight(self.position, target_position, self.model.vision_blocking_obstacles)
+        return self.model.vision_grid.has_line_of_sight(self.position, target_position)
 
     def step_continuous(self, dt):
         """
@@ -1,15 +1,43 @@
 import math
 import random
+from collections import deque
 import pygame
 import config
-from agents.schoolagent import SchoolAgent
-from a_star import astar
+from agents.schoolagent import SchoolAgent, KIND_STUDENT
 from utilities import distance_squared
 
 
+TWO_PI = 2 * math.pi
+AWARENESS_RANGE_SQ = config.AWARENESS_RANGE ** 2
+GUNSHOT_AWARENESS_RANGE_SQ = (config.AWARENESS_RANGE * 1.5) ** 2
+AWARENESS_CHECK_INTERVAL_TICKS = config.AWARENESS_CHECK_INTERVAL_TICKS
+SCREAM_RADIUS = config.SCREAM_RADIUS
+SCREAM_RADIUS_SQ = SCREAM_RADIUS ** 2
+STEAL_RANGE_SQ = config.STEAL_RANGE ** 2
+# Steals are only attempted every STEAL_CHECK_INTERVAL_TICKS ticks, so the per-attempt chance
+# is raised to keep the per-tick rate of config.STEAL_PROBABILITY.
+STEAL_CHECK_INTERVAL_TICKS = config.STEAL_CHECK_INTERVAL_TICKS
+STEAL_ATTEMPT_PROBABILITY = 1 - (1 - config.STEAL_PROBABILITY) ** STEAL_CHECK_INTERVAL_TICKS
+VERBOSE_AGENT_EVENTS = config.VERBOSE_AGENT_EVENTS
+
+
 class StudentAgent(SchoolAgent):
     """Agent class for students with evacuation and potential shooter behaviors."""
 
+    __slots__ = (
+        'in_emergency', 'normal_speed', 'emergency_speed', 'path', 'target_exit_rect',
+        'target_exit_center', 'target_inflated_exit', 'is_shooter', 'last_shot_time',
+        'shooting_interval', 'shooting_range', 'hit_probability',
+        'effective_shooting_range_sq', 'locked_target', 'target_lock_time',
+        'target_last_seen_time', 'target_in_sight', 'target_dx', 'target_dy',
+        'target_distance_sq', 'target_lock_distance', 'target_lock_distance_sq',
+        'target_release_distance', 'target_release_distance_sq', 'max_target_lost_time',
+        'max_target_pursuit_time', 'target_scan_interval', 'next_target_scan_time',
+        'wall_stuck_time', 'wall_stuck_position', 'wall_stuck_threshold',
+        'wall_stuck_distance_threshold', 'wall_stuck_distance_threshold_sq',
+        'search_start_time', 'search_direction_change_time', 'shooter_start_time'
+    )
+
     def __init__(self, unique_id, model, position, agent_type):
         """
         Initialize a StudentAgent.
@@ -25,33 +53,54 @@ class StudentAgent(SchoolAgent):
         self.in_emergency = False
         self.normal_speed = random.uniform(40.0, 60.0)
         self.emergency_speed = random.uniform(config.STUDENT_MAX_SPEED * 0.8, config.STUDENT_MAX_SPEED * 1.1)
-        self.path = []
+        self.path = deque()
         self.target_exit_rect = None
         self.target_exit_center = None
+        self.target_inflated_exit = None
 
         self.is_shooter = False
         self.last_shot_time = 0.0
         self.shooting_interval = config.SHOOTING_INTERVAL
         self.shooting_range = config.SHOOTING_RANGE
         self.hit_probability = config.HIT_PROBABILITY
+        self.effective_shooting_range_sq = (self.shooting_range * 0.95) ** 2
 
         self.locked_target = None
         self.target_lock_time = 0.0
         self.target_last_seen_time = 0.0
+        self.target_in_sight = False
+        # Offset to the locked target, measured by _validate_locked_target or _find_new_target
+        # on the tick it is used by _pursue_target.
+        self.target_dx = 0.0
+        self.target_dy = 0.0
+        self.target_distance_sq = 0.0
         self.target_lock_distance = config.SHOOTING_RANGE
+        self.target_lock_distance_sq = self.target_lock_distance ** 2
         self.target_release_distance = config.SHOOTING_RANGE * 1.2
+        self.target_release_distance_sq = self.target_release_distance ** 2
         self.max_target_lost_time = 2.0
         self.max_target_pursuit_time = 10.0
+        self.target_scan_interval = config.SHOOTER_TARGET_SCAN_INTERVAL
+        self.next_target_scan_time = 0.0
 
         self.wall_stuck_time = 0.0
         self.wall_stuck_position = None
         self.wall_stuck_threshold = 1.0
         self.wall_stuck_distance_threshold = self.radius * 0.5
+        self.wall_stuck_distance_threshold_sq = self.wall_stuck_distance_threshold ** 2
 
         self.search_start_time = 0
         self.search_direction_change_time = 0
         self.shooter_start_time = 0.0
 
+    def become_shooter(self):
+        """
+        Arm this student and register it with the model as an active shooter.
+        """
+        self.is_shooter = True
+        self.has_weapon = True
+        self.model.active_shooters.add(self)
+
     def step_continuous(self, dt):
         """
         Perform one time step, delegating to shooter or standard student behavior.
@@ -76,8 +125,10 @@ class StudentAgent(SchoolAgent):
         if self.shooter_start_time == 0.0:
             self.shooter_start_time = current_time
 
-        if not self._validate_locked_target(current_time):
+        if not self._validate_locked_target(current_time) and current_time >= self.next_target_scan_time:
             self._find_new_target(current_time)
+            if self.locked_target is None:
+                self.next_target_scan_time = current_time + self.target_scan_interval
 
         if self.locked_target is None:
             self._search_behavior(dt, current_time)
@@ -93,13 +144,15 @@ class StudentAgent(SchoolAgent):
         Args:
             dt: The time step duration.
         """
-        if not self.in_emergency:
+        model = self.model
+        if not self.in_emergency and (self.unique_id + model.tick) % AWARENESS_CHECK_INTERVAL_TICKS == 0:
             self._check_shooter_awareness()
-            if not self.in_emergency and config.ENABLE_STUDENT_SCREAMING:
+            if not self.in_emergency and config.ENABLE_STUDENT_SCREAMING and model.fleeing_count:
                 # Check if this student hears another student screaming (Doing by Talking / Talking by Doing).
                 self._check_for_screams()
 
             if self.in_emergency:
+                model.fleeing_count += 1
                 self._calculate_evacuation_path()
 
         if self.in_emergency:
@@ -111,7 +164,8 @@ class StudentAgent(SchoolAgent):
             self.target_speed = self.emergency_speed
             super().move_continuous(dt)
         else:
-            self._check_steal_weapon()
+            if (self.unique_id + model.tick) % STEAL_CHECK_INTERVAL_TICKS == 0:
+                self._check_steal_weapon()
             super().move_continuous(dt)
 
 
@@ -122,31 +176,30 @@ class StudentAgent(SchoolAgent):
         Returns:
             bool: True if awareness was triggered, False otherwise.
         """
-        if not self.model.has_active_shooter:
+        model = self.model
+        if not model.has_active_shooter:
             return False
 
-        awareness_range_sq = config.AWARENESS_RANGE ** 2
+        position = self.position
 
-        for shooter in self.model.active_shooters:
-            if shooter not in self.model.schedule: continue
+        for shooter in model.active_shooters:
+            if not shooter.alive: continue
 
-            dist_squared = distance_squared(self.position, shooter.position)
-            if dist_squared < awareness_range_sq:
+            dist_squared = distance_squared(position, shooter.position)
+            if dist_squared < AWARENESS_RANGE_SQ:
                  if self.has_line_of_sight(shooter.position):
                     self.in_emergency = True
-                    print(f"Student {self.unique_id} spotted shooter {shooter.unique_id}! Entering emergency.")
+                    if VERBOSE_AGENT_EVENTS:
+                        print(f"Student {self.unique_id} spotted shooter {shooter.unique_id}! Entering emergency.")
                     return True
 
-        recent_shot_time_limit = 2.0
-        gunshot_awareness_range_sq = (config.AWARENESS_RANGE * 1.5) ** 2
-
-        for shot in self.model.active_shots:
-             if self.model.simulation_time - shot['start_time'] < recent_shot_time_limit:
-                 dist_sq = distance_squared(self.position, shot['start_pos'])
-                 if dist_sq < gunshot_awareness_range_sq:
-                     self.in_emergency = True
+        for shot_start_pos, _ in model.recent_shots:
+             dist_sq = distance_squared(position, shot_start_pos)
+             if dist_sq < GUNSHOT_AWARENESS_RANGE_SQ:
+                 self.in_emergency = True
+                 if VERBOSE_AGENT_EVENTS:
                      print(f"Student {self.unique_id} heard recent gunshot! Entering emergency.")
-                     return True
+                 return True
 
         return False
 
@@ -160,70 +213,73 @@ class StudentAgent(SchoolAgent):
         Returns:
             bool: True if awareness was triggered by hearing a scream, False otherwise.
         """
-        scream_radius_sq = config.SCREAM_RADIUS ** 2
-        nearby_agents = self.model.spatial_grid.get_nearby_agents(self.position, config.SCREAM_RADIUS)
+        model = self.model
+        position = self.position
+        nearby_agents = model.spatial_grid.get_nearby_agents(position, SCREAM_RADIUS)
 
         for agent in nearby_agents:
             if (agent != self and
-                    agent in self.model.schedule and
-                    isinstance(agent, StudentAgent) and
+                    agent.alive and
+                    agent.kind == KIND_STUDENT and
                     getattr(agent, 'in_emergency', False)):
 
-                dist_squared = distance_squared(self.position, agent.position)
-                if dist_squared < scream_radius_sq:
+                dist_squared = distance_squared(position, agent.position)
+                if dist_squared < SCREAM_RADIUS_SQ:
                     if self.has_line_of_sight(agent.position):
                         # Hearing scream (implied talking) causes Doing (entering emergency).
                         self.in_emergency = True
-                        print(f"Student {self.unique_id} heard scream from student {agent.unique_id}! Entering emergency.")
+                        if VERBOSE_AGENT_EVENTS:
+                            print(f"Student {self.unique_id} heard scream from student {agent.unique_id}! Entering emergency.")
                         return True
 
         return False
 
     def _calculate_evacuation_path(self):
         """
-        Find the nearest exit and calculate an A* path towards it, avoiding walls.
+        Find the nearest exit and follow the model's flow field towards it, avoiding walls.
         """
         closest_exit_rect = None
+        closest_inflated_exit = None
+        closest_exit_center = None
         min_dist_sq = float('inf')
 
         if not self.model.exits:
             print(f"⚠️ Student {self.unique_id}: No exits defined! Cannot calculate path.")
             self.target_exit_center = None
             self.target_exit_rect = None
-            self.path = []
+            self.target_inflated_exit = None
+            self.path = deque()
             return
 
-        for exit_rect in self.model.exits:
-            dist_sq = distance_squared(self.position, exit_rect.center)
+        model = self.model
+        position = self.position
+        for exit_rect, inflated_exit, exit_center in zip(model.exits, model.inflated_exits, model.exit_centers):
+            dist_sq = distance_squared(position, exit_center)
             if dist_sq < min_dist_sq:
                 min_dist_sq = dist_sq
                 closest_exit_rect = exit_rect
+                closest_inflated_exit = inflated_exit
+                closest_exit_center = exit_center
 
         if closest_exit_rect:
             self.target_exit_rect = closest_exit_rect
-            self.target_exit_center = closest_exit_rect.center
-
-            try:
-                path = astar(
-                    self.position,
-                    self.target_exit_center,
-                    self.model.wall_rects
-                )
-
-                if path:
-                    if not path or distance_squared(path[-1], self.target_exit_center) > 1:
-                        path.append(self.target_exit_center)
-                    self.path = path
+            self.target_inflated_exit = closest_inflated_exit
+            self.target_exit_center = closest_exit_center
+
+            path = self.model.flow_field.path_to(self.position, self.target_exit_center)
+
+            if path:
+                if distance_squared(path[-1], self.target_exit_center) > 1:
+                    path.append(self.target_exit_center)
+                self.path = deque(path)
+                if VERBOSE_AGENT_EVENTS:
                     print(f"Student {self.unique_id} calculated path to exit at {self.target_exit_center}.")
-                else:
-                    print(f"⚠️ No A* path found for student {self.unique_id} to {self.target_exit_center}. Will move directly.")
-                    self.path = [self.target_exit_center]
-            except Exception as e:
-                print(f"Error during pathfinding for student {self.unique_id} to {self.target_exit_center}: {e}")
-                self.path = [self.target_exit_center]
+            else:
+                print(f"⚠️ No path found for student {self.unique_id} to {self.target_exit_center}. Will move directly.")
+                self.path = deque([self.target_exit_center])
         else:
              print(f"⚠️ Student {self.unique_id}: Could not find any exits.")
-             self.path = []
+             self.path = deque()
 
 
     def _check_exit_reached(self):
@@ -233,29 +289,37 @@ class StudentAgent(SchoolAgent):
         Returns:
             bool: True if an exit was reached (and agent removed), False otherwise.
         """
-        agent_rect = pygame.Rect(
-            self.position[0] - self.radius,
-            self.position[1] - self.radius,
-            self.radius * 2,
-            self.radius * 2
-        )
+        # Same integer box and strict overlap test as Rect.colliderect, done inline so the common
+        # case of being nowhere near an exit allocates nothing.
+        pos_x, pos_y = self.position
+        radius = self.radius
+        left = int(pos_x - radius)
+        top = int(pos_y - radius)
+        size = int(radius * 2)
+        right = left + size
+        bottom = top + size
+        for exit_left, exit_top, exit_right, exit_bottom in self.model.inflated_exit_bounds:
+            if left < exit_right and right > exit_left and top < exit_bottom and bottom > exit_top:
+                break
+        else:
+            return False
 
-        inflation_amount = self.radius * 2
+        agent_rect = pygame.Rect(left, top, size, size)
 
         if self.target_exit_rect:
-            inflated_target_exit = self.target_exit_rect.inflate(inflation_amount, inflation_amount)
-            if agent_rect.colliderect(inflated_target_exit):
-                print(f"Student {self.unique_id} reached vicinity of targeted exit {self.target_exit_rect.center}!")
+            if agent_rect.colliderect(self.target_inflated_exit):
+                if VERBOSE_AGENT_EVENTS:
+                    print(f"Student {self.unique_id} reached vicinity of targeted exit {self.target_exit_center}!")
                 self.model.remove_agent(self, reason="escaped")
                 return True
 
-        for exit_rect in self.model.exits:
+        for exit_rect, inflated_exit in zip(self.model.exits, self.model.inflated_exits):
              if self.target_exit_rect and exit_rect == self.target_exit_rect:
                   continue
 
-             inflated_exit = exit_rect.inflate(inflation_amount, inflation_amount)
              if agent_rect.colliderect(inflated_exit):
-                 print(f"Student {self.unique_id} reached vicinity of alternative exit {exit_rect.center}!")
+                 if VERBOSE_AGENT_EVENTS:
+                     print(f"Student {self.unique_id} reached vicinity of alternative exit {exit_rect.center}!")
                  self.model.remove_agent(self, reason="escaped")
                  return True
 
@@ -264,50 +328,48 @@ class StudentAgent(SchoolAgent):
 
     def _follow_evacuation_path(self, dt):
         """
-        Move the student along the pre-calculated A* path or directly towards the target exit.
+        Move the student along the pre-calculated flow-field path or directly towards the target exit.
 
         Args:
             dt: The time step duration.
         """
         if not self.path and self.target_exit_center:
-            self.path = [self.target_exit_center]
+            self.path = deque([self.target_exit_center])
         elif not self.path and not self.target_exit_center:
              self.target_speed = 0
              self.velocity = (0,0)
              return
 
-        target_waypoint = self.path[0]
-        target_x, target_y = target_waypoint
+        pos_x, pos_y = self.position
+        target_x, target_y = self.path[0]
 
-        dx = target_x - self.position[0]
-        dy = target_y - self.position[1]
-        dist_to_waypoint = math.hypot(dx, dy)
+        dx = target_x - pos_x
+        dy = target_y - pos_y
+        dist_to_waypoint_sq = dx * dx + dy * dy
 
         waypoint_reach_tolerance = self.emergency_speed * dt * 1.5
 
-        if dist_to_waypoint < waypoint_reach_tolerance:
-            self.position = target_waypoint
-            self.path.pop(0)
+        if dist_to_waypoint_sq < waypoint_reach_tolerance * waypoint_reach_tolerance:
+            # The waypoint counts as reached; steer for the next one and let move_continuous
+            # perform the only position update of this step.
+            self.path.popleft()
 
             if not self.path:
-                print(f"Student {self.unique_id} reached end of calculated path near exit.")
-                if self.target_exit_center:
-                     dx_final = self.target_exit_center[0] - self.position[0]
-                     dy_final = self.target_exit_center[1] - self.position[1]
-                     if dx_final != 0 or dy_final != 0:
-                           self.direction = math.atan2(dy_final, dx_final)
-                self.target_speed = self.emergency_speed
-            else:
-                 next_target_x, next_target_y = self.path[0]
-                 dx_next = next_target_x - self.position[0]
-                 dy_next = next_target_y - self.position[1]
-                 if dx_next != 0 or dy_next != 0:
-                      self.direction = math.atan2(dy_next, dx_next)
-                 self.target_speed = self.emergency_speed
-
-        elif dist_to_waypoint > 0:
+                if VERBOSE_AGENT_EVENTS:
+                    print(f"Student {self.unique_id} reached end of calculated path near exit.")
+                if not self.target_exit_center:
+                    self.target_speed = self.emergency_speed
+                    return
+                # The exit centre stays on the path as the final waypoint until the exit check removes the student.
+                self.path.append(self.target_exit_center)
+
+            target_x, target_y = self.path[0]
+            dx = target_x - pos_x
+            dy = target_y - pos_y
+
+        if dx != 0 or dy != 0:
             self.direction = math.atan2(dy, dx)
-            self.target_speed = self.emergency_speed
+        self.target_speed = self.emergency_speed
 
 
     def _check_steal_weapon(self):
@@ -317,27 +379,28 @@ class StudentAgent(SchoolAgent):
         if self.has_weapon or self.is_shooter or self.in_emergency:
             return
 
-        steal_range_sq = config.STEAL_RANGE ** 2
-        nearby_agents = self.model.spatial_grid.get_nearby_agents(self.position, config.STEAL_RANGE)
+        model = self.model
+        if not model.armed_adults:
+            return
 
-        for agent in nearby_agents:
-            if (agent in self.model.schedule and
-                    agent.agent_type == "adult" and
-                    getattr(agent, 'has_weapon', False)):
+        position = self.position
 
-                dist_squared = distance_squared(self.position, agent.position)
-                if dist_squared < steal_range_sq:
+        # Only armed adults can be robbed, and the model keeps them in a short list.
+        for agent in model.armed_adults:
+            if agent.alive:
+                dist_squared = distance_squared(position, agent.position)
+                if dist_squared < STEAL_RANGE_SQ:
                     if self.has_line_of_sight(agent.position):
-                        if random.random() < config.STEAL_PROBABILITY:
+                        if random.random() < STEAL_ATTEMPT_PROBABILITY:
                             agent.has_weapon = False
-                            self.has_weapon = True
-                            self.is_shooter = True
-                            self.model.active_shooters.add(self)
+                            model.armed_adults.remove(agent)
+                            self.become_shooter()
                             print(f"!!! Student {self.unique_id} stole weapon from Adult {agent.unique_id} and became a shooter!")
-                            self.path = []
+                            self.path = deque()
                             self.in_emergency = False
-                            self.shooter_start_time = self.model.simulation_time
-                            self._find_new_target(self.model.simulation_time)
+                            current_time = model.simulation_time
+                            self.shooter_start_time = current_time
+                            self._find_new_target(current_time)
                             break
 
     def _validate_locked_target(self, current_time):
@@ -350,31 +413,42 @@ class StudentAgent(SchoolAgent):
         Returns:
             bool: True if the target is still valid, False otherwise.
         """
-        if self.locked_target is None:
+        target = self.locked_target
+        if target is None:
             return False
 
-        if self.locked_target not in self.model.schedule:
+        if not target.alive:
             self.locked_target = None
             return False
 
-        dist_squared = distance_squared(self.position, self.locked_target.position)
-        if dist_squared > self.target_release_distance ** 2:
+        target_pos = target.position
+        pos_x, pos_y = self.position
+        dx = target_pos[0] - pos_x
+        dy = target_pos[1] - pos_y
+        dist_squared = dx * dx + dy * dy
+        if dist_squared > self.target_release_distance_sq:
             self.locked_target = None
             return False
+        self.target_dx = dx
+        self.target_dy = dy
+        self.target_distance_sq = dist_squared
 
         if current_time - self.target_lock_time > self.max_target_pursuit_time:
-            print(f"Shooter {self.unique_id} giving up on target {self.locked_target.unique_id} due to pursuit time.")
+            if VERBOSE_AGENT_EVENTS:
+                print(f"Shooter {self.unique_id} giving up on target {target.unique_id} due to pursuit time.")
             self.locked_target = None
             return False
 
-        has_sight = self.has_line_of_sight(self.locked_target.position)
+        has_sight = self.has_line_of_sight(target_pos)
+        self.target_in_sight = has_sight
         if has_sight:
             self.target_last_seen_time = current_time
             return True
         else:
             time_since_seen = current_time - self.target_last_seen_time
             if time_since_seen > self.max_target_lost_time:
-                 print(f"Shooter {self.unique_id} lost sight of target {self.locked_target.unique_id} for too long.")
+                 if VERBOSE_AGENT_EVENTS:
+                     print(f"Shooter {self.unique_id} lost sight of target {target.unique_id} for too long.")
                  self.locked_target = None
                  return False
             return True
@@ -387,29 +461,43 @@ class StudentAgent(SchoolAgent):
             current_time: The current simulation time.
         """
         search_radius = self.target_lock_distance
-        nearby_agents = self.model.spatial_grid.get_nearby_agents(self.position, search_radius)
-        visible_targets = []
+        lock_distance_sq = self.target_lock_distance_sq
+        position = self.position
+        nearby_agents = self.model.spatial_grid.get_nearby_agents(position, search_radius)
 
+        # The grid returns whole cells, so drop out-of-range agents before the costlier LOS test.
+        candidates = []
         for agent in nearby_agents:
             if (agent != self and
-                    agent in self.model.schedule and
-                    agent.agent_type in ["student", "adult"] and
+                    agent.alive and
                     not getattr(agent, 'is_shooter', False)):
-
-                if self.has_line_of_sight(agent.position):
-                    dist_squared = distance_squared(self.position, agent.position)
-                    if dist_squared <= self.target_lock_distance ** 2:
-                        visible_targets.append((agent, dist_squared))
-
-        if not visible_targets:
+                dist_squared = distance_squared(position, agent.position)
+                if dist_squared <= lock_distance_sq:
+                    candidates.append((agent, dist_squared))
+
+        # Nearest first: the first visible candidate is the closest visible one, so the sight tests
+        # stop there. The sort is stable, so ties still go to the earlier grid entry.
+        candidates.sort(key=lambda candidate: candidate[1])
+        vision_grid = self.model.vision_grid
+        best_target = None
+        for agent, dist_squared in candidates:
+            if vision_grid.has_line_of_sight(position, agent.position):
+                best_target = agent
+                self.target_dx = agent.position[0] - position[0]
+                self.target_dy = agent.position[1] - position[1]
+                self.target_distance_sq = dist_squared
+                break
+
+        if best_target is None:
             self.locked_target = None
             return
 
-        visible_targets.sort(key=lambda x: x[1])
-        self.locked_target = visible_targets[0][0]
+        self.locked_target = best_target
         self.target_lock_time = current_time
         self.target_last_seen_time = current_time
-        print(f"Shooter {self.unique_id} locked target: {self.locked_target.unique_id} ({self.locked_target.agent_type})")
+        self.target_in_sight = True
+        if VERBOSE_AGENT_EVENTS:
+            print(f"Shooter {self.unique_id} locked target: {self.locked_target.unique_id} ({self.locked_target.agent_type})")
 
     def _pursue_target(self, dt, current_time):
         """
@@ -419,29 +507,29 @@ class StudentAgent(SchoolAgent):
             dt: The time step duration.
             current_time: The current simulation time.
         """
-        if self.locked_target is None or self.locked_target not in self.model.schedule:
+        target = self.locked_target
+        if target is None or not target.alive:
             self.locked_target = None
             return
 
-        target_pos = self.locked_target.position
-        dx = target_pos[0] - self.position[0]
-        dy = target_pos[1] - self.position[1]
-        distance_sq = dx * dx + dy * dy
-        distance = math.sqrt(distance_sq)
+        # Neither agent has moved since the target was validated or chosen this tick.
+        dx = self.target_dx
+        dy = self.target_dy
+        distance_sq = self.target_distance_sq
 
-        if distance > 1e-6:
+        target_angle = self.direction
+        if distance_sq > 1e-12:
             target_angle = math.atan2(dy, dx)
             self.direction = target_angle
 
-        has_sight = self.has_line_of_sight(target_pos)
-
-        effective_shooting_range = self.shooting_range * 0.95
+        # Sight was already tested this tick by _validate_locked_target or _find_new_target.
+        has_sight = self.target_in_sight
 
-        if distance > effective_shooting_range:
+        if distance_sq > self.effective_shooting_range_sq:
             self.target_speed = self.max_speed
 
             if not has_sight:
-                 self.direction += random.uniform(-math.pi / 6, math.pi / 6)
+                 self.direction += (random.random() - 0.5) * (math.pi / 3)
                  self.target_speed *= 0.8
 
         else:
@@ -450,46 +538,42 @@ class StudentAgent(SchoolAgent):
                 self.velocity = (0, 0)
 
                 if current_time - self.last_shot_time >= self.shooting_interval:
-                    self._shoot_at_target(self.locked_target, current_time)
+                    self._shoot_at_target(target, current_time)
             else:
                 self.target_speed = self.max_speed * 0.4
-                perp_angle_offset = random.choice([-math.pi / 2, math.pi / 2])
-                self.direction = (target_angle + perp_angle_offset) % (2 * math.pi)
+                perp_angle_offset = math.pi / 2 if random.random() < 0.5 else -math.pi / 2
+                self.direction = (target_angle + perp_angle_offset) % TWO_PI
 
     def _shoot_at_target(self, target, current_time):
         """
         Perform the action of shooting at the specified target.
 
+        The caller is expected to have confirmed line of sight this tick.
+
         Args:
             target: The agent being targeted.
             current_time: The current simulation time.
         """
-        if target not in self.model.schedule:
+        if not target.alive:
             self.locked_target = None
             return
 
-        if not self.has_line_of_sight(target.position):
-            return
-
-        shot_data = {
-            'start_pos': self.position,
-            'end_pos': target.position,
-            'start_time': current_time
-        }
-        self.model.active_shots.append(shot_data)
+        model = self.model
+        model.record_shot(self.position, target.position, current_time)
 
-        if hasattr(self.model, 'gunshot_sound') and self.model.gunshot_sound:
-            self.model.gunshot_sound.play()
+        if hasattr(model, 'gunshot_sound') and model.gunshot_sound:
+            model.gunshot_sound.play()
 
         if random.random() < self.hit_probability:
-            print(f"HIT: Shooter {self.unique_id} hit target {target.unique_id} ({target.agent_type})")
+            if VERBOSE_AGENT_EVENTS:
+                print(f"HIT: Shooter {self.unique_id} hit target {target.unique_id} ({target.agent_type})")
 
-            if hasattr(self.model, 'kill_sound') and self.model.kill_sound:
-                self.model.kill_sound.play()
+            if hasattr(model, 'kill_sound') and model.kill_sound:
+                model.kill_sound.play()
 
             if self.locked_target == target:
                 self.locked_target = None
-            self.model.remove_agent(target, reason="died")
+            model.remove_agent(target, reason="died")
         else:
             pass
 
@@ -509,13 +593,13 @@ class StudentAgent(SchoolAgent):
         if self.search_start_time == 0:
             self.search_start_time = current_time
             self.search_direction_change_time = current_time
-            self.direction = random.uniform(0, 2 * math.pi)
+            self.direction = random.random() * TWO_PI
 
         change_interval = config.SHOOTER_SEARCH_DURATION
         if (current_time - self.search_direction_change_time > change_interval
             or self.wall_stuck_time > self.wall_stuck_threshold):
 
-            self.direction = random.uniform(0, 2 * math.pi)
+            self.direction = random.random() * TWO_PI
             self.search_direction_change_time = current_time
             if self.wall_stuck_time > self.wall_stuck_threshold:
                  self.wall_stuck_time = 0
@@ -531,15 +615,16 @@ class StudentAgent(SchoolAgent):
          Args:
              dt: The time step duration.
          """
+         position = self.position
          if self.wall_stuck_position is None:
-              self.wall_stuck_position = self.position
+              self.wall_stuck_position = position
               self.wall_stuck_time = 0
               return
 
-         dist_sq_moved = distance_squared(self.position, self.wall_stuck_position)
+         dist_sq_moved = distance_squared(position, self.wall_stuck_position)
 
-         if dist_sq_moved < self.wall_stuck_distance_threshold ** 2:
+         if dist_sq_moved < self.wall_stuck_distance_threshold_sq:
               self.wall_stuck_time += dt
          else:
               self.wall_stuck_time = 0
-              self.wall_stuck_position = self.position
\ No newline at end of file
+              self.wall_stuck_position = position
\ No newline at end of file
@@ -57,12 +57,17 @@ SHOOTING_INTERVAL = 2.0
 SHOOTING_RANGE = 100.0
 HIT_PROBABILITY = 0.7
 SHOOTER_SEARCH_DURATION = 5.0
+SHOOTER_TARGET_SCAN_INTERVAL = 0.1
 STEAL_RANGE = 10.0
 STEAL_PROBABILITY = 0.001
+STEAL_CHECK_INTERVAL_TICKS = 5
 
 
 ADULT_RESPONSE_DELAY_RANGE = (0.5, 2.0)
 AWARENESS_RANGE = 200
+GUNSHOT_AWARENESS_DURATION = 2.0
+# calm students scan every N ticks (staggered by id); 1 = every tick
+AWARENESS_CHECK_INTERVAL_TICKS = 3
 SCREAM_RADIUS = 30
 ENABLE_STUDENT_SCREAMING = True
 
@@ -70,6 +75,7 @@ ENABLE_STUDENT_SCREAMING = True
 VISION_CONE_ANGLE = 120
 MAX_VISION_DISTANCE = 150
 SHOT_VISUALIZATION_DURATION = 0.25
+MAX_ACTIVE_SHOTS = 64
 ALERT_DURATION = 5.0
 
 
@@ -78,6 +84,10 @@ KILL_SOUND_FILE = "kill.wav"
 SOUND_VOLUME = 0.4
 
 
+# Per-agent event logging. The agent modules read this once at import time.
+VERBOSE_AGENT_EVENTS = False
+
+
 COLORS = {
     "WHITE": (255, 255, 255),
     "BLACK": (0, 0, 0),
@@ -1,7 +1,10 @@
 import math
 import random
 import os
+import heapq
+from collections import deque
 from grid_converter import integrate_grid_into_simulation
+from utilities import line_intersects_rectangle
 import config
 import pygame
 
@@ -32,8 +35,7 @@ class AgentFactory:
             from agents.studentagent import StudentAgent
             agent = StudentAgent(unique_id, model, position, agent_type)
             if is_shooter:
-                agent.is_shooter = True
-                agent.has_weapon = True
+                agent.become_shooter()
             return agent
         elif agent_type == "adult":
             from agents.adultagent import AdultAgent
@@ -58,12 +60,12 @@ class SpatialGrid:
         self.grid_width = math.ceil(width / cell_size)
         self.grid_height = math.ceil(height / cell_size)
         self.grid = {}
-        self.agent_positions = {}
+        self.agent_cells = {}
 
     def clear(self):
         """Clear all agents and cells from the grid."""
         self.grid = {}
-        self.agent_positions = {}
+        self.agent_cells = {}
 
     def _get_cell_indices(self, position):
         """
@@ -88,14 +90,11 @@ class SpatialGrid:
         Args:
             agent (SchoolAgent): The agent instance to update.
         """
-        current_position = agent.position
-        current_cell = self._get_cell_indices(current_position)
-
-        if agent in self.agent_positions:
-            last_position, last_cell = self.agent_positions[agent]
+        current_cell = self._get_cell_indices(agent.position)
 
+        last_cell = self.agent_cells.get(agent)
+        if last_cell is not None:
             if last_cell == current_cell:
-                self.agent_positions[agent] = (current_position, current_cell)
                 return
 
             if last_cell in self.grid and agent in self.grid[last_cell]:
@@ -107,7 +106,7 @@ class SpatialGrid:
             self.grid[current_cell] = []
         self.grid[current_cell].append(agent)
 
-        self.agent_positions[agent] = (current_position, current_cell)
+        self.agent_cells[agent] = current_cell
 
     def remove_agent(self, agent):
         """
@@ -116,18 +115,18 @@ class SpatialGrid:
         Args:
             agent (SchoolAgent): The agent instance to remove.
         """
-        if agent in self.agent_positions:
-            _, cell = self.agent_positions[agent]
+        if agent in self.agent_cells:
+            cell = self.agent_cells.pop(agent)
             if cell in self.grid and agent in self.grid[cell]:
                 self.grid[cell].remove(agent)
                 if not self.grid[cell]:
                     del self.grid[cell]
-            del self.agent_positions[agent]
 
     def get_nearby_agents(self, position, radius):
         """
         Retrieve a list of all agents located in cells that overlap with the specified radius around a position.
         Note: This returns agents in nearby cells; further distance checking might be needed.
+        Large queries that span more cells than are occupied scan the occupied cells instead.
 
         Args:
             position (tuple): The center (x, y) coordinates of the search area.
@@ -136,21 +135,313 @@ class SpatialGrid:
         Returns:
             list: A list of agent instances potentially within the radius.
         """
-        center_x, center_y = position
         cell_radius = math.ceil(radius / self.cell_size)
         cell_x, cell_y = self._get_cell_indices(position)
 
+        min_cell_x = max(0, cell_x - cell_radius)
+        max_cell_x = min(self.grid_width, cell_x + cell_radius)
+        min_cell_y = max(0, cell_y - cell_radius)
+        max_cell_y = min(self.grid_height, cell_y + cell_radius)
+
         nearby_agents = []
+        grid = self.grid
 
-        for dx in range(-cell_radius, cell_radius + 1):
-            for dy in range(-cell_radius, cell_radius + 1):
-                cell_key = (cell_x + dx, cell_y + dy)
-                if cell_key in self.grid:
-                    nearby_agents.extend(self.grid[cell_key])
+        if (max_cell_x - min_cell_x + 1) * (max_cell_y - min_cell_y + 1) > len(grid):
+            for (other_x, other_y), cell_agents in grid.items():
+                if min_cell_x <= other_x <= max_cell_x and min_cell_y <= other_y <= max_cell_y:
+                    nearby_agents.extend(cell_agents)
+            return nearby_agents
+
+        for other_x in range(min_cell_x, max_cell_x + 1):
+            for other_y in range(min_cell_y, max_cell_y + 1):
+                cell_agents = grid.get((other_x, other_y))
+                if cell_agents:
+                    nearby_agents.extend(cell_agents)
 
         return nearby_agents
 
 
+class ObstacleGrid:
+    """A static grid index over obstacle rectangles, used to limit line-of-sight tests to nearby obstacles."""
+
+    def __init__(self, obstacles, cell_size):
+        """
+        Initialize the ObstacleGrid and register every obstacle in each cell it overlaps.
+
+        Args:
+            obstacles (list): A list of pygame.Rect objects. The list is assumed not to change afterwards.
+            cell_size (int): The size of each grid cell.
+        """
+        self.cell_size = cell_size
+        self.obstacles = obstacles
+        self.cells = {}
+
+        for index, rect in enumerate(obstacles):
+            min_cell_x = int((rect.left - 1) // cell_size)
+            max_cell_x = int((rect.right + 1) // cell_size)
+            min_cell_y = int((rect.top - 1) // cell_size)
+            max_cell_y = int((rect.bottom + 1) // cell_size)
+            for cell_x in range(min_cell_x, max_cell_x + 1):
+                for cell_y in range(min_cell_y, max_cell_y + 1):
+                    self.cells.setdefault((cell_x, cell_y), []).append(index)
+
+    def has_line_of_sight(self, start_pos, end_pos):
+        """
+        Check if the segment between two points is free of obstacles. Only the cells crossed by the
+        segment are visited (grid traversal), and each obstacle is tested at most once.
+
+        Args:
+            start_pos (tuple): The starting (x, y) coordinates.
+            end_pos (tuple): The ending (x, y) coordinates.
+
+        Returns:
+            bool: True if no obstacle intersects the segment, False otherwise.
+        """
+        start_x, start_y = start_pos
+        end_x, end_y = end_pos
+        cell_size = self.cell_size
+        cells = self.cells
+        obstacles = self.obstacles
+
+        cell_x = int(start_x // cell_size)
+        cell_y = int(start_y // cell_size)
+        end_cell_x = int(end_x // cell_size)
+        end_cell_y = int(end_y // cell_size)
+
+        dx = end_x - start_x
+        dy = end_y - start_y
+
+        if dx > 0:
+            step_x = 1
+            t_delta_x = cell_size / dx
+            t_max_x = ((cell_x + 1) * cell_size - start_x) / dx
+        elif dx < 0:
+            step_x = -1
+            t_delta_x = -cell_size / dx
+            t_max_x = (cell_x * cell_size - start_x) / dx
+        else:
+            step_x = 0
+            t_delta_x = t_max_x = float('inf')
+
+        if dy > 0:
+            step_y = 1
+            t_delta_y = cell_size / dy
+            t_max_y = ((cell_y + 1) * cell_size - start_y) / dy
+        elif dy < 0:
+            step_y = -1
+            t_delta_y = -cell_size / dy
+            t_max_y = (cell_y * cell_size - start_y) / dy
+        else:
+            step_y = 0
+            t_delta_y = t_max_y = float('inf')
+
+        tested = set()
+        remaining_steps = abs(end_cell_x - cell_x) + abs(end_cell_y - cell_y)
+
+        while True:
+            cell_obstacles = cells.get((cell_x, cell_y))
+            if cell_obstacles:
+                for index in cell_obstacles:
+                    if index in tested:
+                        continue
+                    tested.add(index)
+                    if line_intersects_rectangle(start_x, start_y, end_x, end_y, obstacles[index]):
+                        return False
+
+            if remaining_steps <= 0:
+                return True
+            remaining_steps -= 1
+
+            if t_max_x < t_max_y:
+                cell_x += step_x
+                t_max_x += t_delta_x
+            else:
+                cell_y += step_y
+                t_max_y += t_delta_y
+
+    def obstacles_near(self, x, y, radius):
+        """
+        Retrieve the indices of obstacles registered in the cells overlapping a square around a point.
+        Note: This is a coarse filter; callers still need their own exact overlap test.
+
+        Args:
+            x (float): The x coordinate of the query point.
+            y (float): The y coordinate of the query point.
+            radius (float): Half the side length of the query square.
+
+        Returns:
+            list: The candidate obstacle indices in ascending order.
+        """
+        cell_size = self.cell_size
+        cells = self.cells
+        min_cell_x = int((x - radius) // cell_size)
+        max_cell_x = int((x + radius) // cell_size)
+        min_cell_y = int((y - radius) // cell_size)
+        max_cell_y = int((y + radius) // cell_size)
+
+        if min_cell_x == max_cell_x and min_cell_y == max_cell_y:
+            return cells.get((min_cell_x, min_cell_y), [])
+
+        found = set()
+        for cell_x in range(min_cell_x, max_cell_x + 1):
+            for cell_y in range(min_cell_y, max_cell_y + 1):
+                cell_obstacles = cells.get((cell_x, cell_y))
+                if cell_obstacles:
+                    found.update(cell_obstacles)
+        return sorted(found)
+
+
+class FlowField:
+    """
+    Shortest walking routes to exits over a fixed lattice of points. One Dijkstra pass per exit
+    replaces a separate A* search for every evacuating student.
+    """
+
+    def __init__(self, walls, wall_grid, width, height, step=5, goal_radius=10):
+        """
+        Initialize the FlowField and mark which lattice points are walkable.
+
+        Args:
+            walls (list): A list of pygame.Rect objects blocking movement.
+            wall_grid (ObstacleGrid): A grid index over the same walls.
+            width (int): Width of the simulation area.
+            height (int): Height of the simulation area.
+            step (int, optional): Spacing between lattice points. Defaults to 5.
+            goal_radius (float, optional): Lattice points within this distance of a goal count as
+                                           having reached it. Defaults to 10.
+        """
+        self.step = step
+        self.goal_radius = goal_radius
+        self.columns = int(width // step) + 1
+        self.rows = int(height // step) + 1
+        self.fields = {}
+
+        self.walkable = [False] * (self.columns * self.rows)
+        for row in range(self.rows):
+            y = row * step
+            for column in range(self.columns):
+                x = column * step
+                probe_rect = pygame.Rect(x - 2, y - 2, 4, 4)
+                blocked = False
+                for wall_index in wall_grid.obstacles_near(x, y, 3):
+                    if probe_rect.colliderect(walls[wall_index]):
+                        blocked = True
+                        break
+                self.walkable[row * self.columns + column] = not blocked
+
+        diagonal_cost = step * math.sqrt(2)
+        self.neighbor_offsets = [
+            (1, 0, step), (-1, 0, step), (0, 1, step), (0, -1, step),
+            (1, 1, diagonal_cost), (-1, 1, diagonal_cost),
+            (1, -1, diagonal_cost), (-1, -1, diagonal_cost)
+        ]
+
+    def _build_field(self, goal):
+        """
+        Run Dijkstra outwards from the lattice points around a goal.
+
+        Args:
+            goal (tuple): The (x, y) goal position.
+
+        Returns:
+            tuple: (cost, next_index) lists indexed by lattice point. cost is None for unreachable
+                   points; next_index is the neighbouring point one step closer to the goal, or -1
+                   at the goal itself.
+        """
+        step = self.step
+        columns = self.columns
+        rows = self.rows
+        walkable = self.walkable
+        size = columns * rows
+        cost = [None] * size
+        next_index = [-1] * size
+        open_set = []
+
+        goal_x, goal_y = goal
+        reach = int(self.goal_radius // step) + 1
+        goal_column = int(round(goal_x / step))
+        goal_row = int(round(goal_y / step))
+        for row in range(max(0, goal_row - reach), min(rows, goal_row + reach + 1)):
+            for column in range(max(0, goal_column - reach), min(columns, goal_column + reach + 1)):
+                index = row * columns + column
+                dx = column * step - goal_x
+                dy = row * step - goal_y
+                distance = math.sqrt(dx * dx + dy * dy)
+                if walkable[index] and distance < self.goal_radius:
+                    cost[index] = distance
+                    heapq.heappush(open_set, (distance, index))
+
+        while open_set:
+            current_cost, index = heapq.heappop(open_set)
+            if current_cost > cost[index]:
+                continue
+            row, column = divmod(index, columns)
+            for d_column, d_row, step_cost in self.neighbor_offsets:
+                neighbor_column = column + d_column
+                neighbor_row = row + d_row
+                if not (0 <= neighbor_column < columns and 0 <= neighbor_row < rows):
+                    continue
+                neighbor = neighbor_row * columns + neighbor_column
+                if not walkable[neighbor]:
+                    continue
+                new_cost = current_cost + step_cost
+                if cost[neighbor] is None or new_cost < cost[neighbor]:
+                    cost[neighbor] = new_cost
+                    next_index[neighbor] = index
+                    heapq.heappush(open_set, (new_cost, neighbor))
+
+        return cost, next_index
+
+    def path_to(self, start_pos, goal):
+        """
+        Build the lattice waypoints leading from a position to a goal. The field for a goal is built
+        the first time it is requested and reused afterwards.
+
+        Args:
+            start_pos (tuple): The (x, y) position to start from.
+            goal (tuple): The (x, y) goal position.
+
+        Returns:
+            list: A list of (x, y) waypoints, or an empty list if the goal cannot be reached.
+        """
+        field = self.fields.get(goal)
+        if field is None:
+            field = self._build_field(goal)
+            self.fields[goal] = field
+        cost, next_index = field
+
+        step = self.step
+        columns = self.columns
+        start_column = int(round(start_pos[0] / step))
+        start_row = int(round(start_pos[1] / step))
+
+        # The nearest lattice point may be blocked or unreachable; fall back to its best neighbour.
+        best_index = None
+        best_cost = None
+        for d_column, d_row, step_cost in [(0, 0, 0.0)] + self.neighbor_offsets:
+            column = start_column + d_column
+            row = start_row + d_row
+            if not (0 <= column < columns and 0 <= row < self.rows):
+                continue
+            index = row * columns + column
+            if cost[index] is not None and (best_cost is None or cost[index] + step_cost < best_cost):
+                best_index = index
+                best_cost = cost[index] + step_cost
+            if d_column == 0 and d_row == 0 and best_index is not None:
+                break
+
+        if best_index is None:
+            return []
+
+        path = []
+        index = best_index
+        while index != -1:
+            row, column = divmod(index, columns)
+            path.append((column * step, row * step))
+            index = next_index[index]
+        return path
+
+
 class SchoolModel:
     """
     The main simulation model managing agents, environment, and simulation state.
@@ -176,10 +467,17 @@ class SchoolModel:
         self.height = height
         self.armed_adults_count = armed_adults_count
         self.armed_adults_current = 0
+        self.armed_adults = []
         self.running = True
         self.schedule = []
-        self.active_shots = []
+        self.students = []
+        self.adults = []
+        self.active_shots = deque(maxlen=config.MAX_ACTIVE_SHOTS)
+        self.recent_shots = deque()
+        # Students currently in emergency; while it is zero nobody can be screaming.
+        self.fleeing_count = 0
         self.simulation_time = 0.0
+        self.tick = 0
         self.active_shooters = set()
         self.shooter_check_interval = config.SHOOTER_CHECK_INTERVAL
         self.last_shooter_check_time = 0.0
@@ -225,8 +523,21 @@ class SchoolModel:
 
 
         self.wall_rects = self.walls
+        # Plain edge tuples for the per-agent wall distance loops, saving four Rect attribute reads per wall.
+        self.wall_bounds = [(rect.left, rect.top, rect.right, rect.bottom) for rect in self.walls]
+        self._inflated_walls = {}
+
+        # Exit zones grown by a student's reach, built once for the per-tick exit check.
+        exit_reach = config.STUDENT_RADIUS * 2
+        self.inflated_exits = [exit_rect.inflate(exit_reach, exit_reach) for exit_rect in self.exits]
+        self.exit_centers = [exit_rect.center for exit_rect in self.exits]
+        self.inflated_exit_bounds = [(rect.left, rect.top, rect.right, rect.bottom) for rect in self.inflated_exits]
 
         self.visual_obstacles = self.walls + self.doors
+        self.vision_grid = ObstacleGrid(self.visual_obstacles, cell_size=20)
+        # Adults look past doors, so their sight checks use a walls-only index.
+        self.wall_grid = ObstacleGrid(self.walls, cell_size=20)
+        self.flow_field = FlowField(self.walls, self.wall_grid, width, height)
 
         self._create_all_agents()
 
@@ -234,6 +545,7 @@ class SchoolModel:
         """Create and place all initial student and adult agents in safe positions."""
         all_positions = []
         min_distance_between_agents = 8.0
+        min_distance_between_agents_sq = min_distance_between_agents ** 2
 
         for _ in range(self.num_students + self.num_adults):
             for attempt in range(100):
@@ -243,7 +555,7 @@ class SchoolModel:
                 for existing_pos in all_positions:
                     dx = position[0] - existing_pos[0]
                     dy = position[1] - existing_pos[1]
-                    if dx * dx + dy * dy < min_distance_between_agents ** 2:
+                    if dx * dx + dy * dy < min_distance_between_agents_sq:
                         too_close = True
                         break
 
@@ -258,8 +570,7 @@ class SchoolModel:
         for i in range(self.num_students):
             position = all_positions[i]
             agent = AgentFactory.create_agent("student", i, self, position, is_shooter=False)
-            self.schedule.append(agent)
-            self.spatial_grid.update_agent(agent)
+            self._register_agent(agent)
 
         armed_adults_to_create = min(self.armed_adults_count, self.num_adults)
         armed_indices = random.sample(range(self.num_adults), armed_adults_to_create)
@@ -272,12 +583,26 @@ class SchoolModel:
                 agent.has_weapon = True
                 agent.color = (255, 255, 0)
                 self.armed_adults_current += 1
+                self.armed_adults.append(agent)
                 print(f"Adult {agent.unique_id} is armed and ready to respond")
             else:
                 agent.has_weapon = False
 
-            self.schedule.append(agent)
-            self.spatial_grid.update_agent(agent)
+            self._register_agent(agent)
+
+    def _register_agent(self, agent):
+        """
+        Add a newly created agent to the schedule, its per-type list and the spatial grid.
+
+        Args:
+            agent (SchoolAgent): The agent instance to register.
+        """
+        self.schedule.append(agent)
+        if agent.agent_type == "student":
+            self.students.append(agent)
+        elif agent.agent_type == "adult":
+            self.adults.append(agent)
+        self.spatial_grid.update_agent(agent)
 
     def step_continuous(self, dt):
         """
@@ -290,6 +615,12 @@ class SchoolModel:
             return
 
         self.simulation_time += dt
+        self.tick += 1
+
+        # Drop gunshots that are too old to be heard; the rest are scanned by every agent this tick.
+        recent_shots = self.recent_shots
+        while recent_shots and self.simulation_time - recent_shots[0][1] >= config.GUNSHOT_AWARENESS_DURATION:
+            recent_shots.popleft()
 
         if not self.has_active_shooter and self.simulation_time - self.last_shooter_check_time >= self.shooter_check_interval:
             self.last_shooter_check_time = self.simulation_time
@@ -331,23 +662,32 @@ class SchoolModel:
         random.shuffle(self.schedule)
         agents_to_process = list(self.schedule)
         for agent in agents_to_process:
-            if agent in self.schedule:
+            # Agents removed earlier in this tick (shot, escaped) are skipped; the flag avoids a list scan.
+            if agent.alive:
                 agent.step_continuous(dt)
 
+    def record_shot(self, start_pos, end_pos, start_time):
+        """
+        Store a fired shot in the fixed-size active shot buffer (once the buffer is full,
+        the oldest shot is dropped) and in the list of recent shots agents can hear.
+
+        Args:
+            start_pos (tuple): The (x, y) position the shot was fired from.
+            end_pos (tuple): The (x, y) position the shot was aimed at.
+            start_time (float): The simulation time at which the shot was fired.
+        """
+        self.active_shots.append((start_pos, end_pos, start_time))
+        self.recent_shots.append((start_pos, start_time))
+
     def _check_for_shooter_emergence(self):
         """Randomly checks if an eligible student becomes a shooter based on configured probability."""
         if random.random() > self.shooter_emergence_probability:
             return
-        student_agents = [
-            agent for agent in self.schedule
-            if agent.agent_type == "student" and not agent.is_shooter
-        ]
+        student_agents = [agent for agent in self.students if not agent.is_shooter]
         if not student_agents:
             return
         random_student = random.choice(student_agents)
-        random_student.is_shooter = True
-        random_student.has_weapon = True
-        self.active_shooters.add(random_student)
+        random_student.become_shooter()
         print(f"ALERT: Student {random_student.unique_id} has become an active shooter "
               f"at time {self.simulation_time:.1f}s")
 
@@ -358,17 +698,12 @@ class SchoolModel:
         Returns:
             bool: True if a shooter was successfully added, False otherwise (e.g., no eligible students).
         """
-        student_agents = [
-            agent for agent in self.schedule
-            if agent.agent_type == "student" and not agent.is_shooter
-        ]
+        student_agents = [agent for agent in self.students if not agent.is_shooter]
         if not student_agents:
             print("No eligible students available to become a shooter.")
             return False
         random_student = random.choice(student_agents)
-        random_student.is_shooter = True
-        random_student.has_weapon = True
-        self.active_shooters.add(random_student)
+        random_student.become_shooter()
         print(f"MANUAL ALERT: Student {random_student.unique_id} has become an active shooter "
               f"at time {self.simulation_time:.1f}s")
 
@@ -406,7 +741,23 @@ class SchoolModel:
         """
         list: A combined list of pygame.Rect objects for walls and doors, used for line-of-sight checks.
         """
-        return self.walls + self.doors
+        return self.visual_obstacles
+
+    def inflated_walls(self, amount):
+        """
+        Retrieve the walls grown by a fixed amount, built once per amount and reused afterwards.
+
+        Args:
+            amount (float): The total growth in width and height, as passed to pygame.Rect.inflate.
+
+        Returns:
+            list: A list of pygame.Rect objects, index-aligned with self.walls.
+        """
+        inflated = self._inflated_walls.get(amount)
+        if inflated is None:
+            inflated = [wall_rect.inflate(amount, amount) for wall_rect in self.walls]
+            self._inflated_walls[amount] = inflated
+        return inflated
 
     def add_students(self, count):
         """
@@ -419,8 +770,7 @@ class SchoolModel:
         for i in range(count):
             position = self.generate_safe_position(min_wall_distance=5.0)
             agent = AgentFactory.create_agent("student", current_id + i, self, position)
-            self.schedule.append(agent)
-            self.spatial_grid.update_agent(agent)
+            self._register_agent(agent)
         self.num_students += count
 
     def add_adults(self, count):
@@ -444,12 +794,12 @@ class SchoolModel:
             if i in armed_indices:
                 agent.has_weapon = True
                 self.armed_adults_current += 1
+                self.armed_adults.append(agent)
                 print(f"Added Adult {agent.unique_id} is armed.")
             else:
                 agent.has_weapon = False
 
-            self.schedule.append(agent)
-            self.spatial_grid.update_agent(agent)
+            self._register_agent(agent)
         self.num_adults += count
 
     def generate_safe_position(self, min_wall_distance=5.0, max_attempts=100):
@@ -528,7 +878,7 @@ class SchoolModel:
                 x = padding + (self.width - 2 * padding) * i / (grid_size - 1)
                 y = padding + (self.height - 2 * padding) * j / (grid_size - 1)
 
-                min_distance = float('inf')
+                min_distance_sq = float('inf')
                 inside_obstacle = False
 
                 for obst_rect in obstacles:
@@ -540,13 +890,14 @@ class SchoolModel:
                     clamped_y = max(obst_rect.top, min(y, obst_rect.bottom))
                     dx = x - clamped_x
                     dy = y - clamped_y
-                    distance = math.hypot(dx, dy)
-                    min_distance = min(min_distance, distance)
+                    distance_sq = dx * dx + dy * dy
+                    if distance_sq < min_distance_sq:
+                        min_distance_sq = distance_sq
 
                 if inside_obstacle:
                     continue
 
-                candidates.append((x, y, min_distance))
+                candidates.append((x, y, math.sqrt(min_distance_sq)))
 
         if candidates:
             candidates.sort(key=lambda c: -c[2])
@@ -565,7 +916,7 @@ class SchoolModel:
             reason (str, optional): The reason for removal ('died' or 'escaped'). Affects counters.
                                      Defaults to "died".
         """
-        if agent in self.schedule:
+        if agent.alive:
             if reason == "died":
                 if agent.agent_type == "student":
                     self.dead_student_count += 1
@@ -584,8 +935,19 @@ class SchoolModel:
                 print(
                     f"Shooter {agent.unique_id} removed ({reason}). Active shooters left: {len(self.active_shooters)}")
 
+            if agent in self.armed_adults:
+                self.armed_adults.remove(agent)
+
+            if getattr(agent, 'in_emergency', False):
+                self.fleeing_count -= 1
+
             self.spatial_grid.remove_agent(agent)
             self.schedule.remove(agent)
+            if agent.agent_type == "student":
+                self.students.remove(agent)
+            elif agent.agent_type == "adult":
+                self.adults.remove(agent)
+            agent.alive = False
 
     def collect_step_data(self):
         """
@@ -595,23 +957,10 @@ class SchoolModel:
             dict: A dictionary containing simulation statistics for the current step (e.g., agent counts).
                   Returns None if data collection is throttled (optional, currently not implemented).
         """
-        living_students = 0
-        living_adults = 0
-        living_armed_adults = 0
-        living_unarmed_adults = 0
-        living_shooters = 0
-
-        for agent in self.schedule:
-            if agent.agent_type == "student":
-                living_students += 1
-                if getattr(agent, 'is_shooter', False):
-                    living_shooters += 1
-            elif agent.agent_type == "adult":
-                living_adults += 1
-                if getattr(agent, 'has_weapon', False):
-                    living_armed_adults += 1
-                else:
-                    living_unarmed_adults += 1
+        living_students = len(self.students)
+        living_adults = len(self.adults)
+        living_armed_adults = sum(1 for agent in self.adults if agent.has_weapon)
+        living_unarmed_adults = living_adults - living_armed_adults
 
 
         current_living_shooters = len(self.active_shooters)
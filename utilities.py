@@ -65,31 +65,6 @@ def line_intersects_rectangle(line_x1, line_y1, line_x2, line_y2, wall_rect):
         return False
 
 
-def has_line_of_sight(start_pos, end_pos, obstacles):
-    """
-    Check if there is an unobstructed line of sight between two points, considering obstacles.
-
-    Args:
-        start_pos (tuple): The starting (x, y) coordinates.
-        end_pos (tuple): The ending (x, y) coordinates.
-        obstacles (list): A list of pygame.Rect objects representing vision-blocking elements.
-
-    Returns:
-        bool: True if there is a clear line of sight, False if an obstacle intersects the line segment.
-    """
-    start_x, start_y = start_pos
-    end_x, end_y = end_pos
-
-    for obstacle_rect in obstacles:
-        if line_intersects_rectangle(
-            start_x, start_y, end_x, end_y,
-            obstacle_rect
-        ):
-            return False
-
-    return True
-
-
 def distance_squared(pos1, pos2):
     """
     Calculate the squared Euclidean distance between two points.
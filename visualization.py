@@ -294,24 +294,20 @@ class Visualizer:
         self.screen.blit(overlay, (0, 0))
 
     def draw_shots(self):
-        """Draw lines representing active gunshots that haven't expired."""
+        """Draw lines representing active gunshots that haven't expired, dropping expired ones."""
         current_time = self.model.simulation_time
         shot_duration = config.SHOT_VISUALIZATION_DURATION
+        active_shots = self.model.active_shots
 
-        valid_shots = [
-            shot for shot in self.model.active_shots
-            if current_time - shot['start_time'] < shot_duration
-        ]
+        while active_shots and current_time - active_shots[0][2] >= shot_duration:
+            active_shots.popleft()
 
         shot_color = self.COLORS["SHOT"]
-        for shot in valid_shots:
-            start_screen = self._model_to_screen_pos(shot['start_pos'])
-            end_screen = self._model_to_screen_pos(shot['end_pos'])
+        for start_pos, end_pos, _ in active_shots:
+            start_screen = self._model_to_screen_pos(start_pos)
+            end_screen = self._model_to_screen_pos(end_pos)
             pygame.draw.line(self.screen, shot_color, start_screen, end_screen, 1)
 
-        if len(valid_shots) != len(self.model.active_shots):
-            self.model.active_shots = valid_shots
-
     def draw_exits(self):
         """Draw rectangles representing the designated exit areas."""
         exit_fill = self.COLORS["EXIT_FILL"]